@@ -1,26 +1,55 @@
 import streamlit as st
-import pandas as pd
 import os
+import csv
+import atexit
+import shutil
 from datetime import datetime, date
+from koala_auth import password_hash, password_matches
 
 # --- SECURITY CONFIG ---
-ACCESS_PASSWORD = "Koala2025"
+# Only digests of the passwords are kept in memory (None = not configured, login stays locked)
+PW_HASH = password_hash("KOALA_PW")
+DASH_PW_HASH = password_hash("KOALA_DASH_PW")
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Koala Insite", layout="wide")
 
-FILES = {"sales": "sales.csv"}
-TIERS = {"Tier 1 (₱125)": 125, "Tier 2 (₱150)": 150}
+# sales = hot working copy (Feather), archive = closed orders (zstd Parquet, one folder per month), journal = today's appended orders
+FILES = {"sales": "sales.feather", "archive": "sales_archive", "journal": "sales_journal.csv"}
+# Older ledgers, migrated once by init_db
+LEGACY_FILES = {"sales": "sales.csv", "parquet": "sales.parquet", "archive": "sales_archive.parquet"}
+ARCHIVE_AFTER_DAYS = 30  # Claimed + Paid orders older than this move to the Parquet archive
+# Pricing tiers as parallel tuples: the tier picker returns a position, so the price is a plain index
+TIER_LABELS = ("Tier 1 (₱125)", "Tier 2 (₱150)")
+TIER_PRICES = (125, 150)
+GARMENT_TYPES = ("Regular", "Semi-Heavy", "Heavy")
+# Status options (one tuple each) plus value -> position maps for preselecting widgets
+WORK_OPTS = ("WIP", "Ready", "Claimed")
+PAY_STATUS_OPTS = ("Paid", "Unpaid")
+PAY_TYPE_OPTS = ("Cash", "GCash")
+WORK_IDX = {v: i for i, v in enumerate(WORK_OPTS)}
+PAY_STATUS_IDX = {v: i for i, v in enumerate(PAY_STATUS_OPTS)}
+PAY_TYPE_IDX = {v: i for i, v in enumerate(PAY_TYPE_OPTS)}
+# Ledger column -> its UI options
+STATUS_OPTS = {"Payment_Type": PAY_TYPE_OPTS, "Payment_Status": PAY_STATUS_OPTS, "Work_Status": WORK_OPTS}
+
+# Columns the Manage Orders bulk editor is allowed to change
+BULK_EDIT_COLS = ["Work_Status", "Payment_Status", "Payment_Type", "Notes"]
+BULK_PAGE_SIZE = 50  # Rows per page in the bulk editor (only the current page is sent to the browser)
 
 # --- LOGIN LOGIC ---
 def check_password():
     def password_entered():
-        if st.session_state["password"] == ACCESS_PASSWORD:
+        if password_matches(st.session_state["password"], PW_HASH):
             st.session_state["password_correct"] = True
             del st.session_state["password"]
         else:
             st.session_state["password_correct"] = False
 
+    if PW_HASH is None:
+        st.title("🧺 Koala Management System")
+        st.error("🔒 No shop password is configured. Set KOALA_PW as an environment variable or in .streamlit/secrets.toml.")
+        return False
     if "password_correct" not in st.session_state:
         st.title("🧺 Koala Management System")
         st.text_input("Enter Shop Password", type="password", on_change=password_entered, key="password")
@@ -33,29 +62,209 @@ def check_password():
     return True
 
 if check_password():
+    # Heavy imports wait until after login so the password screen paints fast on a cold start
+    import pandas as pd
+    import polars as pl
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    # Column schema for the sales ledger (kept typed on disk so reads need no fix-ups)
+    # Free-text columns are Arrow-backed strings; low-cardinality columns are categories
+    # so equality filters compare small integer codes
+    SALES_DTYPES = {
+        "Order_ID": "string[pyarrow]", "Date": "datetime64[ns]", "Customer": "string[pyarrow]", "Contact": "string[pyarrow]",
+        "Tier": "category", "Garment_Type": "category", "Loads": "int64", "Additionals": "float64",
+        "Misc_Amount": "float64", "Amount": "float64",
+        "Payment_Type": "category", "Payment_Status": "category", "Work_Status": "category",
+        "Notes": "string[pyarrow]"
+    }
+
     # --- LOGOUT & DB INIT ---
     if st.sidebar.button("Log Out"):
         st.session_state["password_correct"] = False
         st.rerun()
 
-    def init_db():
-        if not os.path.exists(FILES["sales"]):
-            df = pd.DataFrame(columns=[
-                "Order_ID", "Date", "Customer", "Contact", "Tier", "Garment_Type", 
-                "Loads", "Additionals", "Misc_Amount", "Amount", "Payment_Type", 
-                "Payment_Status", "Work_Status", "Notes"
-            ])
-            df.to_csv(FILES["sales"], index=False)
-    init_db()
+    def _mtime(path):
+        return os.path.getmtime(path) if os.path.exists(path) else None
 
-    def load_data():
-        df = pd.read_csv(FILES["sales"], dtype={"Notes": str, "Contact": str, "Order_ID": str, "Work_Status": str, "Payment_Status": str})
+    def _archive_mtime(path):
+        # Partition rewrites touch the Month=... folders, not the archive root, so check both
+        if not os.path.isdir(path) or not os.listdir(path):
+            return None
+        return max([os.path.getmtime(path)] + [e.stat().st_mtime for e in os.scandir(path) if e.is_dir()])
+
+    def _typed(df):
+        # Feather/Parquet only keep the categories they saw, so re-apply the full schema.
+        # Status columns always carry their UI options (Manage Orders can assign any of them);
+        # values outside those (old labels, hand edits) are kept as extra categories, never nulled
+        df = df.astype(SALES_DTYPES)
+        for col, opts in STATUS_OPTS.items():
+            df[col] = df[col].cat.set_categories(list(opts) + [v for v in df[col].cat.categories if v not in opts])
         df["Notes"] = df["Notes"].fillna("")
-        df["Date"] = pd.to_datetime(df["Date"]).dt.date
         return df
 
+    @st.cache_data(show_spinner=False)
+    def _load_archive_cached(path, mtime):
+        if mtime is None:
+            return _typed(pd.DataFrame(columns=list(SALES_DTYPES)))
+        return _typed(pd.read_parquet(path, engine="pyarrow", columns=list(SALES_DTYPES)))
+
+    @st.cache_data(show_spinner=False)
+    def _load_working_cached(path, mtime):
+        # Working copy is uncompressed Feather: the cheapest read on the rerun path
+        return _typed(pd.read_feather(path))
+
+    @st.cache_data(show_spinner=False)
+    def _load_data_cached(path, journal_path, mtimes):
+        # Archive and working copy are cached on their own mtimes, so a New Sale only re-reads the journal
+        parts = [_load_archive_cached(FILES["archive"], mtimes[1]), _load_working_cached(path, mtimes[0])]
+        if mtimes[2] is not None:
+            # New orders since the last compaction live in the append-only journal
+            parts.append(_typed(pd.read_csv(journal_path, dtype={c: "string[pyarrow]" for c in ("Order_ID", "Customer", "Contact", "Notes")}, parse_dates=["Date"], date_format="%Y-%m-%d")))
+        df = pd.concat(parts, ignore_index=True)
+        # Hash index on Order_ID for O(1) fetch/update/delete (column kept for display)
+        return df.set_index("Order_ID", drop=False).rename_axis(None)
+
+    def _ledger_mtimes():
+        return (_mtime(FILES["sales"]), _archive_mtime(FILES["archive"]), _mtime(FILES["journal"]))
+
+    def load_data():
+        # The files' mtimes are part of the cache key, so reruns skip the read until the ledger changes.
+        # The frame is also kept per session, so page switches skip even the cache's copy-out
+        # (callers only modify it right before save_data, which moves the mtimes on)
+        mtimes = _ledger_mtimes()
+        if st.session_state.get("_sales_mtimes") != mtimes:
+            st.session_state._sales_df = _load_data_cached(FILES["sales"], FILES["journal"], mtimes)
+            st.session_state._sales_mtimes = mtimes
+        return st.session_state._sales_df
+
+    @st.cache_data(show_spinner=False)
+    def _sales_summary(mtimes):
+        # One group-by pass over the ledger; every dashboard metric is sliced from this small table
+        return pl.from_pandas(load_data()).lazy().group_by(
+            pl.col("Date").dt.date(), "Payment_Type", "Payment_Status", "Work_Status"
+        ).agg(pl.col("Amount").sum(), pl.len().alias("Orders")).collect()
+
+    @st.cache_resource
+    def _db():
+        # One in-memory DuckDB for the whole server; each query takes its own cursor (sessions run on separate threads)
+        return duckdb.connect(":memory:")
+
+    @st.cache_data(show_spinner=False)
+    def _dashboard_metrics(mtimes, today_val, start_date, end_date):
+        # Every Dashboard figure (headline + period split) in one DuckDB pass over the daily summary
+        # (scanned via Arrow, no copy); cached per ledger version, day and period
+        with _db().cursor() as con:
+            con.register("summary", _sales_summary(mtimes))
+            return con.execute("""
+                SELECT
+                    coalesce(sum(Amount) FILTER (WHERE Date = $today), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Date = $today AND Payment_Type = 'Cash'), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Date = $today AND Payment_Type = 'GCash'), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Payment_Status = 'Unpaid'), 0),
+                    coalesce(sum(Orders) FILTER (WHERE Work_Status = 'WIP'), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Date BETWEEN $start AND $end), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Date BETWEEN $start AND $end AND Payment_Type = 'Cash'), 0),
+                    coalesce(sum(Amount) FILTER (WHERE Date BETWEEN $start AND $end AND Payment_Type = 'GCash'), 0)
+                FROM summary
+            """, {"today": today_val, "start": start_date, "end": end_date}).fetchone()
+
+    def _save_archive(archive, old):
+        # Only the month partitions whose rows actually changed are rewritten
+        # (categories are compared as text, since each file keeps only the ones it saw)
+        as_text = {c: "string[pyarrow]" for c in ("Tier", "Garment_Type", *STATUS_OPTS)}
+        new_months, old_months = archive["Date"].dt.strftime("%Y-%m"), old["Date"].dt.strftime("%Y-%m")
+        changed = [
+            m for m in set(new_months) | set(old_months)
+            if not archive[new_months == m].reset_index(drop=True).astype(as_text).equals(old[old_months == m].reset_index(drop=True).astype(as_text))
+        ]
+        for m in set(changed) - set(new_months):
+            shutil.rmtree(os.path.join(FILES["archive"], f"Month={m}"))
+        rows = new_months.isin(changed)
+        if rows.any():
+            ds.write_dataset(
+                pa.Table.from_pandas(archive[rows].assign(Month=new_months[rows]), preserve_index=False),
+                FILES["archive"], format="parquet", partitioning=["Month"], partitioning_flavor="hive",
+                existing_data_behavior="delete_matching", basename_template="part-{i}.parquet",
+                file_options=ds.ParquetFileFormat().make_write_options(compression="zstd")
+            )
+
     def save_data(df):
-        df.to_csv(FILES["sales"], index=False)
+        # Split the ledger: closed orders past the cutoff go cold, everything else stays hot
+        df = _typed(df.reset_index(drop=True))
+        cutoff = pd.Timestamp(date.today()) - pd.Timedelta(days=ARCHIVE_AFTER_DAYS)
+        cold = (df["Work_Status"] == "Claimed") & (df["Payment_Status"] == "Paid") & (df["Date"] < cutoff)
+        _save_archive(df[cold].reset_index(drop=True), _load_archive_cached(FILES["archive"], _archive_mtime(FILES["archive"])))
+        # Full rewrite of the working copy; this also compacts the journal into it
+        df[~cold].reset_index(drop=True).to_feather(FILES["sales"], compression="uncompressed")
+        if os.path.exists(FILES["journal"]):
+            _journal_handle(FILES["journal"]).close()  # Release the append handle first (Windows can't remove open files)
+            os.remove(FILES["journal"])
+        # Drop superseded ledger versions explicitly (older mtime keys would otherwise linger in memory)
+        _load_working_cached.clear()
+        _load_data_cached.clear()
+        _sales_summary.clear()
+        _dashboard_metrics.clear()
+
+    @st.cache_resource(show_spinner=False)
+    def _open_journals():
+        # Current append handle per journal path; one exit hook per server closes whichever are open
+        handles = {}
+        atexit.register(lambda: [f.close() for f in handles.values()])
+        return handles
+
+    @st.cache_resource(show_spinner=False, validate=lambda f: not f.closed and os.path.exists(f.name))
+    def _journal_handle(path):
+        # One long-lived append handle per server; reopened once the journal is compacted away
+        handles = _open_journals()
+        if path in handles:
+            handles[path].close()  # The handle being replaced (no-op if compaction already closed it)
+        handles[path] = f = open(path, "a", newline="", encoding="utf-8")
+        return f
+
+    def append_data(row):
+        # O(1) insert: write the order dict straight to the journal, no DataFrame round-trip
+        f = _journal_handle(FILES["journal"])
+        writer = csv.DictWriter(f, fieldnames=list(SALES_DTYPES))
+        if f.tell() == 0:
+            writer.writeheader()
+        writer.writerow(row)
+        f.flush()
+        _load_data_cached.clear()
+        _sales_summary.clear()
+        _dashboard_metrics.clear()
+
+    def init_db():
+        if os.path.exists(LEGACY_FILES["archive"]):
+            # One-time migration: split the single-file archive into month partitions
+            _save_archive(_typed(pd.read_parquet(LEGACY_FILES["archive"], engine="pyarrow")), _load_archive_cached(None, None))
+            os.remove(LEGACY_FILES["archive"])
+        if os.path.exists(FILES["sales"]):
+            # Fold yesterday's journal into the working copy once per day (and roll closed orders into the archive)
+            journal_mtime = _mtime(FILES["journal"])
+            if journal_mtime is not None and date.fromtimestamp(journal_mtime) < date.today():
+                save_data(load_data())
+            return
+        if os.path.exists(LEGACY_FILES["parquet"]):
+            # One-time migration: split the single Parquet ledger (plus its journal) into working copy + archive
+            pd.read_parquet(LEGACY_FILES["parquet"], engine="pyarrow").to_feather(FILES["sales"], compression="uncompressed")
+            save_data(load_data())
+            return
+        if os.path.exists(LEGACY_FILES["sales"]):
+            # One-time migration: carry the old CSV ledger over
+            df = pd.read_csv(LEGACY_FILES["sales"], dtype={"Notes": str, "Contact": str, "Order_ID": str})
+            df["Date"] = pd.to_datetime(df["Date"], format="ISO8601", cache=True)
+            df["Notes"] = df["Notes"].fillna("")
+            num_cols = ["Loads", "Additionals", "Misc_Amount", "Amount"]
+            df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
+        else:
+            df = pd.DataFrame(columns=list(SALES_DTYPES))
+        save_data(df)
+    # Once per session per day (the date keeps the daily journal fold going for sessions left open overnight)
+    if st.session_state.get("_db_inited") != date.today():
+        init_db()
+        st.session_state._db_inited = date.today()
 
     # --- NAVIGATION ---
     st.sidebar.title("🧺 Koala Insite")
@@ -64,7 +273,7 @@ if check_password():
     # 1. DASHBOARD
     if menu == "Dashboard":
         # --- ADMIN SECURITY CHECK ---
-        DASHBOARD_PASSWORD = "Bebot88"  # <--- Change this to your preferred admin password
+        # Owner password comes from KOALA_DASH_PW (env var or secrets.toml); see DASH_PW_HASH
 
         # Initialize the specific state for dashboard access
         if "dashboard_unlocked" not in st.session_state:
@@ -74,11 +283,13 @@ if check_password():
         if not st.session_state.dashboard_unlocked:
             st.title("🔒 Admin Access Required")
             st.info("This section contains sensitive financial data.")
+            if DASH_PW_HASH is None:
+                st.error("🔒 No owner password is configured. Set KOALA_DASH_PW as an environment variable or in .streamlit/secrets.toml.")
             
             admin_input = st.text_input("Enter Owner Password", type="password", key="dash_pass_input")
             
             if st.button("Unlock Dashboard"):
-                if admin_input == DASHBOARD_PASSWORD:
+                if password_matches(admin_input, DASH_PW_HASH):
                     st.session_state.dashboard_unlocked = True
                     st.rerun()
                 else:
@@ -86,214 +297,274 @@ if check_password():
         
         # If unlocked, show the actual dashboard
         else:
-            # Optional: Button to re-lock the screen
-            if st.button("🔒 Lock Dashboard"):
-                st.session_state.dashboard_unlocked = False
-                st.rerun()
+            # Runs as a fragment: changing the period dates only reruns the dashboard, not the whole app
+            @st.fragment
+            def dashboard_body():
+                # Optional: Button to re-lock the screen
+                if st.button("🔒 Lock Dashboard"):
+                    st.session_state.dashboard_unlocked = False
+                    st.rerun()
 
-            st.title("📊 Business Performance")
-            sales_df = load_data()
+                st.title("📊 Business Performance")
+                mtimes = _ledger_mtimes()
+                summary = _sales_summary(mtimes)
             
-            if not sales_df.empty:
-                today_val = date.today()
-                today_sales = sales_df[sales_df["Date"] == today_val]["Amount"].sum()
-                unpaid_total = sales_df[sales_df["Payment_Status"] == "Unpaid"]["Amount"].sum()
+                if summary.height:
+                    today_val = date.today()
+                    # Headline metrics sit above the period pickers but share their query, so reserve the space first
+                    headline = st.container()
+                
+                    # --- Date Range Breakdown ---
+                    st.divider()
+                    st.subheader("📅 Sales Period Breakdown")
+                    d1, d2 = st.columns(2)
+                    start_date = d1.date_input("Start Date", today_val.replace(day=1))
+                    end_date = d2.date_input("End Date", today_val)
+                    (today_sales, cash_total, gcash_total, unpaid_total, wip_jobs,
+                     period_sales, period_cash, period_gcash) = _dashboard_metrics(mtimes, today_val, start_date, end_date)
                 
-                c1, c2, c3 = st.columns(3)
-                c1.metric("Sales Today", f"₱{today_sales:,.2f}")
-                c2.metric("Unpaid Receivables", f"₱{unpaid_total:,.2f}")
-                c3.metric("WIP Jobs", len(sales_df[sales_df["Work_Status"] == "WIP"]))
+                    with headline:
+                        c1, c2, c3 = st.columns(3)
+                        c1.metric("Sales Today", f"₱{today_sales:,.2f}")
+                        c2.metric("Unpaid Receivables", f"₱{unpaid_total:,.2f}")
+                        c3.metric("WIP Jobs", wip_jobs)
+                    
+                        c4, c5, _ = st.columns(3)
+                        c4.metric("Cash Today", f"₱{cash_total:,.2f}")
+                        c5.metric("GCash Today", f"₱{gcash_total:,.2f}")
                 
-                # (You can add your Date Range breakdown code here if needed)
-            else:
-                st.info("No records found yet.")
+                    p1, p2, p3 = st.columns(3)
+                    p1.metric("Period Sales", f"₱{period_sales:,.2f}")
+                    p2.metric("Cash", f"₱{period_cash:,.2f}")
+                    p3.metric("GCash", f"₱{period_gcash:,.2f}")
+                else:
+                    st.info("No records found yet.")
+
+            dashboard_body()
 
     # 2. NEW SALE (FIXED)
     elif menu == "New Sale":
         st.title("💰 Create New Job Order")
 
-        # --- 0. PERSISTENT SUCCESS MESSAGE LOGIC ---
-        # Check if a message exists from the previous run (before the reset)
-        if "last_success_msg" in st.session_state and st.session_state.last_success_msg:
-            st.success(st.session_state.last_success_msg)
-            # Clear it immediately so it doesn't stay on screen forever
-            del st.session_state.last_success_msg
-
         # --- 1. SESSION STATE FOR RESETTING ---
         if "form_key" not in st.session_state:
             st.session_state.form_key = 0
 
-        # Reset Button (Manual Clear)
-        if st.button("🔄 Reset Form"):
-            st.session_state.form_key += 1
-            st.rerun()
-
         # --- 2. THE FORM ---
-        with st.form("order_form", clear_on_submit=False):
-            st.subheader("👤 Customer & Service")
+        # Runs as a fragment: Reset, "Update Total" and Confirm Order only rerun this block, not the whole app
+        @st.fragment
+        def order_form():
+            # --- 0. SUCCESS TOAST ---
+            # Message left by the Confirm that triggered this rerun; popped so it only shows once
+            if st.session_state.get("last_success_msg"):
+                st.toast(st.session_state.pop("last_success_msg"))
+
+            # Reset Button (Manual Clear) - bumping the key in the callback redraws an empty form on this fragment run
+            def reset_form():
+                st.session_state.form_key += 1
+            st.button("🔄 Reset Form", on_click=reset_form)
+
+            with st.form("order_form", clear_on_submit=False):
+                st.subheader("👤 Customer & Service")
             
-            # Helper for the current key
-            k = st.session_state.form_key
+                # Helper for the current key
+                k = st.session_state.form_key
             
-            col1, col2 = st.columns(2)
-            with col1:
-                cust_name = st.text_input("Customer Name", key=f"cust_name_{k}")
-                contact = st.text_input("Contact Number", key=f"contact_{k}")
-                selected_tier = st.selectbox("Pricing Tier", list(TIERS.keys()), key=f"tier_{k}")
-                garment = st.selectbox("Garment Type", ["Regular", "Semi-Heavy", "Heavy"], key=f"garment_{k}")
-            with col2:
-                loads = st.number_input("Loads", min_value=1, step=1, key=f"loads_{k}")
-                open_amt = st.number_input("Misc / Open Amount (₱)", min_value=0.0, key=f"open_{k}")
-                pay_type = st.radio("Payment", ["Cash", "GCash"], horizontal=True, key=f"ptype_{k}")
-                pay_status = st.radio("Status", ["Unpaid", "Paid"], horizontal=True, key=f"pstat_{k}")
-
-            st.divider()
-            st.subheader("🧴 Add-ons (Supplies)")
+                col1, col2 = st.columns(2)
+                with col1:
+                    cust_name = st.text_input("Customer Name", key=f"cust_name_{k}")
+                    contact = st.text_input("Contact Number", key=f"contact_{k}")
+                    tier_idx = st.selectbox("Pricing Tier", range(len(TIER_LABELS)), format_func=TIER_LABELS.__getitem__, key=f"tier_{k}")
+                    garment = st.selectbox("Garment Type", GARMENT_TYPES, key=f"garment_{k}")
+                with col2:
+                    loads = st.number_input("Loads", min_value=1, step=1, key=f"loads_{k}")
+                    open_amt = st.number_input("Misc / Open Amount (₱)", min_value=0.0, key=f"open_{k}")
+                    pay_type = st.radio("Payment", PAY_TYPE_OPTS, horizontal=True, key=f"ptype_{k}")
+                    pay_status = st.radio("Status", ["Unpaid", "Paid"], horizontal=True, key=f"pstat_{k}")
+
+                st.divider()
+                st.subheader("🧴 Add-ons (Supplies)")
             
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("##### Detergent")
-                det_brand = st.text_input("Brand", placeholder="e.g. Ariel", key=f"d_brand_{k}")
-                det_price = st.number_input("Amount (₱)", min_value=0.0, step=5.0, key=f"d_price_{k}")
+                c1, c2 = st.columns(2)
+                with c1:
+                    st.markdown("##### Detergent")
+                    det_brand = st.text_input("Brand", placeholder="e.g. Ariel", key=f"d_brand_{k}")
+                    det_price = st.number_input("Amount (₱)", min_value=0.0, step=5.0, key=f"d_price_{k}")
             
-            with c2:
-                st.markdown("##### Fabric Conditioner")
-                fab_brand = st.text_input("Brand", placeholder="e.g. Downy", key=f"f_brand_{k}")
-                fab_price = st.number_input("Amount (₱)", min_value=0.0, step=5.0, key=f"f_price_{k}")
-
-            st.divider()
-            notes = st.text_area("Notes / Remarks", key=f"notes_{k}")
-            work_status = st.select_slider("Work Status", options=["WIP", "Ready", "Claimed"], key=f"ws_{k}")
-
-            # --- Calculation Logic ---
-            base_price = float(TIERS[selected_tier] * loads)
-            supplies_total = float(det_price) + float(fab_price)
-            grand_total = base_price + supplies_total + float(open_amt)
-
-            # --- Display Totals ---
-            st.markdown(f"""
-            <div style="background-color:#f0f2f6; padding:15px; border-radius:10px; margin-bottom:10px;">
-                <h4>🧾 Payment Summary</h4>
-                <p>Base Laundry: ₱{base_price:,.2f}<br>
-                Supplies: ₱{supplies_total:,.2f}<br>
-                Misc: ₱{open_amt:,.2f}</p>
-                <h3 style="color:#007bff;">Total Amount: ₱{grand_total:,.2f}</h3>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # --- Actions ---
-            col_actions1, col_actions2 = st.columns(2)
-            with col_actions1:
-                update_click = st.form_submit_button("🔄 Update Total", type="secondary", width='stretch')
-            with col_actions2:
-                confirm_click = st.form_submit_button("✅ Confirm Order", type="primary", width='stretch')
-
-            # --- Save Logic ---
-            if confirm_click:
-                if not cust_name:
-                    st.error("⚠️ Customer Name is required.")
-                else:
-                    # Format supplies string
-                    supplies_str = []
-                    if det_price > 0 or det_brand:
-                        supplies_str.append(f"Det: {det_brand} (₱{det_price})")
-                    if fab_price > 0 or fab_brand:
-                        supplies_str.append(f"Fab: {fab_brand} (₱{fab_price})")
-                    
-                    supplies_final = ", ".join(supplies_str) if supplies_str else "None"
-
-                    new_entry = pd.DataFrame([{
-                        "Order_ID": datetime.now().strftime("%y%m%d-%H%M%S"),
-                        "Date": date.today(), 
-                        "Customer": cust_name, 
-                        "Contact": str(contact),
-                        "Tier": selected_tier, 
-                        "Garment_Type": garment, 
-                        "Loads": loads,
-                        "Additionals": supplies_total, 
-                        "Misc_Amount": open_amt, 
-                        "Amount": grand_total,
-                        "Payment_Type": pay_type, 
-                        "Payment_Status": pay_status,
-                        "Work_Status": work_status, 
-                        "Notes": f"{supplies_final} | {notes}"
-                    }])
+                with c2:
+                    st.markdown("##### Fabric Conditioner")
+                    fab_brand = st.text_input("Brand", placeholder="e.g. Downy", key=f"f_brand_{k}")
+                    fab_price = st.number_input("Amount (₱)", min_value=0.0, step=5.0, key=f"f_price_{k}")
+
+                st.divider()
+                notes = st.text_area("Notes / Remarks", key=f"notes_{k}")
+                work_status = st.select_slider("Work Status", options=WORK_OPTS, key=f"ws_{k}")
+
+                # --- Calculation Logic ---
+                base_price = float(TIER_PRICES[tier_idx] * loads)
+                supplies_total = float(det_price) + float(fab_price)
+                grand_total = base_price + supplies_total + float(open_amt)
+
+                # --- Display Totals ---
+                with st.container(border=True):
+                    st.markdown("#### 🧾 Payment Summary")
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Base Laundry", f"₱{base_price:,.2f}")
+                    m2.metric("Supplies", f"₱{supplies_total:,.2f}")
+                    m3.metric("Misc", f"₱{open_amt:,.2f}")
+                    m4.metric("Total Amount", f"₱{grand_total:,.2f}")
+
+                # --- Actions ---
+                col_actions1, col_actions2 = st.columns(2)
+                with col_actions1:
+                    update_click = st.form_submit_button("🔄 Update Total", type="secondary", width='stretch')
+                with col_actions2:
+                    confirm_click = st.form_submit_button("✅ Confirm Order", type="primary", width='stretch')
+
+                # --- Save Logic ---
+                if confirm_click:
+                    if not cust_name:
+                        st.error("⚠️ Customer Name is required.")
+                    else:
+                        # Format supplies string (quick orders with no add-ons skip the list entirely)
+                        if supplies_total == 0 and not det_brand and not fab_brand:
+                            supplies_final = "None"
+                        else:
+                            supplies_str = []
+                            if det_price > 0 or det_brand:
+                                supplies_str.append(f"Det: {det_brand} (₱{det_price})")
+                            if fab_price > 0 or fab_brand:
+                                supplies_str.append(f"Fab: {fab_brand} (₱{fab_price})")
+                            supplies_final = ", ".join(supplies_str)
+
+                        # One clock read so Order_ID and Date can't straddle midnight
+                        now = datetime.now()
+                        new_entry = {
+                            "Order_ID": f"{now.year % 100:02d}{now.month:02d}{now.day:02d}-{now.hour:02d}{now.minute:02d}{now.second:02d}",
+                            "Date": now.date().isoformat(), 
+                            "Customer": cust_name, 
+                            "Contact": str(contact),
+                            "Tier": TIER_LABELS[tier_idx], 
+                            "Garment_Type": garment, 
+                            "Loads": loads,
+                            "Additionals": supplies_total, 
+                            "Misc_Amount": open_amt, 
+                            "Amount": grand_total,
+                            "Payment_Type": pay_type, 
+                            "Payment_Status": pay_status,
+                            "Work_Status": work_status, 
+                            "Notes": f"{supplies_final} | {notes}"
+                        }
                     
-                    # Append and Save
-                    current_df = pd.read_csv(FILES["sales"])
-                    save_data(pd.concat([current_df, new_entry], ignore_index=True))
+                        # Append to the journal (no full-ledger rewrite)
+                        append_data(new_entry)
                     
-                    # --- SUCCESS HANDLING ---
-                    # Store the message in session state so it survives the rerun
-                    st.session_state.last_success_msg = f"✅ Success! Order for {cust_name} saved. (Total: ₱{grand_total:,.2f})"
+                        # --- SUCCESS HANDLING ---
+                        # Store the message in session state so it survives the rerun
+                        st.session_state.last_success_msg = f"✅ Success! Order for {cust_name} saved. (Total: ₱{grand_total:,.2f})"
                     
-                    # Increment key to reset form, then rerun to show the empty form + success message
-                    st.session_state.form_key += 1
-                    st.rerun()
+                        # Increment key to reset form, then rerun just the fragment to show the empty form + toast
+                        st.session_state.form_key += 1
+                        st.rerun(scope="fragment")
+
+        order_form()
 
     # 3. MANAGE ORDERS
     elif menu == "Manage Orders":
         st.title("📋 Job Order Management")
-        sales_df = load_data()
+        # Runs as a fragment: fetching, paging and searching only rerun this page's block
+        @st.fragment
+        def manage_orders():
+            sales_df = load_data()
         
-        if not sales_df.empty:
-            # --- FETCH SECTION ---
-            st.subheader("🔍 Fetch & Actions")
-            order_to_fetch = st.text_input("Enter Order ID (e.g., 231219-1200)")
+            if not sales_df.empty:
+                # Statuses outside the UI options are kept as they are; list them so they can be fixed here
+                unknown = {c: [v for v in sales_df[c].dropna().unique() if v not in opts] for c, opts in STATUS_OPTS.items()}
+                unknown = {c: v for c, v in unknown.items() if v}
+                if unknown:
+                    st.warning("⚠️ Unrecognized status values (kept as-is): " + "; ".join(f"{c}: {', '.join(map(str, v))}" for c, v in unknown.items()))
+
+                # --- FETCH SECTION ---
+                st.subheader("🔍 Fetch & Actions")
+                order_to_fetch = st.text_input("Enter Order ID (e.g., 231219-1200)")
             
-            if order_to_fetch:
-                fetched_job = sales_df[sales_df["Order_ID"] == order_to_fetch]
-                if not fetched_job.empty:
-                    st.info(f"Managing Order for: **{fetched_job.iloc[0]['Customer']}**")
+                if order_to_fetch:
+                    if order_to_fetch in sales_df.index:
+                        fetched_job = sales_df.loc[[order_to_fetch]]
+                        st.info(f"Managing Order for: **{fetched_job.iloc[0]['Customer']}**")
                     
-                    # Update & Delete Layout
-                    tab_update, tab_delete = st.tabs(["Update Status", "⚠️ Delete Order"])
+                        # Update & Delete Layout
+                        tab_update, tab_delete = st.tabs(["Update Status", "⚠️ Delete Order"])
                     
-                    with tab_update:
-                        with st.form("update_form"):
-                            c1, c2, c3 = st.columns(3)
-                            # Safe index finding
-                            curr_work = fetched_job.iloc[0]["Work_Status"]
-                            curr_pay = fetched_job.iloc[0]["Payment_Status"]
-                            curr_type = fetched_job.iloc[0]["Payment_Type"]
+                        with tab_update:
+                            with st.form("update_form"):
+                                c1, c2, c3 = st.columns(3)
+                                # Safe index finding
+                                curr_work = fetched_job.iloc[0]["Work_Status"]
+                                curr_pay = fetched_job.iloc[0]["Payment_Status"]
+                                curr_type = fetched_job.iloc[0]["Payment_Type"]
                             
-                            u_work = c1.selectbox("Work Status", ["WIP", "Ready", "Claimed"], index=["WIP", "Ready", "Claimed"].index(curr_work) if curr_work in ["WIP", "Ready", "Claimed"] else 0)
-                            u_pay = c2.selectbox("Payment Status", ["Paid", "Unpaid"], index=["Paid", "Unpaid"].index(curr_pay) if curr_pay in ["Paid", "Unpaid"] else 0)
-                            u_type = c3.selectbox("Payment Type", ["Cash", "GCash"], index=["Cash", "GCash"].index(curr_type) if curr_type in ["Cash", "GCash"] else 0)
+                                u_work = c1.selectbox("Work Status", WORK_OPTS, index=WORK_IDX.get(curr_work, 0))
+                                u_pay = c2.selectbox("Payment Status", PAY_STATUS_OPTS, index=PAY_STATUS_IDX.get(curr_pay, 0))
+                                u_type = c3.selectbox("Payment Type", PAY_TYPE_OPTS, index=PAY_TYPE_IDX.get(curr_type, 0))
                             
-                            u_notes = st.text_area("Update Notes", value=fetched_job.iloc[0]["Notes"])
+                                u_notes = st.text_area("Update Notes", value=fetched_job.iloc[0]["Notes"])
                             
-                            if st.form_submit_button("Save Changes"):
-                                sales_df.loc[sales_df["Order_ID"] == order_to_fetch, ["Work_Status", "Payment_Status", "Payment_Type", "Notes"]] = [u_work, u_pay, u_type, str(u_notes)]
-                                save_data(sales_df)
-                                st.success("Updated!")
+                                if st.form_submit_button("Save Changes"):
+                                    sales_df.loc[order_to_fetch, ["Work_Status", "Payment_Status", "Payment_Type", "Notes"]] = [u_work, u_pay, u_type, str(u_notes)]
+                                    save_data(sales_df)
+                                    st.success("Updated!")
+                                    st.rerun()
+
+                        with tab_delete:
+                            st.warning("Deletions cannot be undone. This will remove the record from your sales history.")
+                            confirm_check = st.checkbox("I confirm that I want to delete this order.")
+                            if st.button("Delete Permanently", disabled=not confirm_check):
+                                save_data(sales_df.drop(index=order_to_fetch))
+                                st.error(f"Order {order_to_fetch} deleted.")
                                 st.rerun()
+                    else:
+                        st.error("Order ID not found.")
 
-                    with tab_delete:
-                        st.warning("Deletions cannot be undone. This will remove the record from your sales history.")
-                        confirm_check = st.checkbox("I confirm that I want to delete this order.")
-                        if st.button("Delete Permanently", disabled=not confirm_check):
-                            updated_df = sales_df[sales_df["Order_ID"] != order_to_fetch]
-                            save_data(updated_df)
-                            st.error(f"Order {order_to_fetch} deleted.")
-                            st.rerun()
-                else:
-                    st.error("Order ID not found.")
-
-            st.divider()
-            st.subheader("📝 Bulk Status Editor")
-            edited_df = st.data_editor(
-                sales_df,
-                column_config={
-                    "Work_Status": st.column_config.SelectboxColumn("Work Status", options=["WIP", "Ready", "Claimed"]),
-                    "Payment_Status": st.column_config.SelectboxColumn("Payment Status", options=["Paid", "Unpaid"]),
-                    "Payment_Type": st.column_config.SelectboxColumn("Payment Type", options=["Cash", "GCash"]),
-                    "Notes": st.column_config.TextColumn("Notes", width="large")
-                },
-                disabled=["Order_ID", "Date", "Customer", "Amount", "Tier", "Loads", "Add_on_Fixed", "Open_Amount", "Garment_Type", "Contact"],
-                width='stretch', hide_index=True
-            )
-            if st.button("Save All Bulk Changes"):
-                save_data(edited_df)
-                st.success("Bulk updates saved!")
-                st.rerun()
+                st.divider()
+                st.subheader("📝 Bulk Status Editor")
+                search = st.text_input("🔎 Filter by Customer or Order ID", key="bulk_search").strip()
+                display_df = sales_df
+                if search:
+                    # Plain substring match (no regex), both columns combined into one mask
+                    mask = sales_df["Customer"].str.contains(search, case=False, regex=False, na=False) | sales_df["Order_ID"].str.contains(search, case=False, regex=False, na=False)
+                    display_df = sales_df[mask]
+                # Newest orders first, so page 1 is the recent work (stable sort keeps same-day orders in entry order)
+                display_df = display_df.sort_values("Date", ascending=False, kind="stable")
+                # Page through the (filtered) ledger; the save diff works on whatever slice was shown
+                pages = max(1, -(-len(display_df) // BULK_PAGE_SIZE))
+                page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+                display_df = display_df.iloc[(page - 1) * BULK_PAGE_SIZE : page * BULK_PAGE_SIZE]
+                edited_df = st.data_editor(
+                    display_df,
+                    column_config={
+                        # Date stays datetime64 on the wire (Arrow); only its display is trimmed to the day
+                        "Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+                        "Work_Status": st.column_config.SelectboxColumn("Work Status", options=WORK_OPTS),
+                        "Payment_Status": st.column_config.SelectboxColumn("Payment Status", options=PAY_STATUS_OPTS),
+                        "Payment_Type": st.column_config.SelectboxColumn("Payment Type", options=PAY_TYPE_OPTS),
+                        "Notes": st.column_config.TextColumn("Notes", width="large")
+                    },
+                    disabled=[c for c in SALES_DTYPES if c not in BULK_EDIT_COLS],
+                    width='stretch', hide_index=True
+                )
+                if st.button("Save All Bulk Changes"):
+                    # Diff against the ledger so only rows that actually changed are written back
+                    # (compared as text: categories differ between the page and the ledger, and missing == missing)
+                    edited = edited_df[BULK_EDIT_COLS].astype("string[pyarrow]").fillna({"Notes": ""})
+                    current = sales_df.loc[edited.index, BULK_EDIT_COLS].astype("string[pyarrow]")
+                    changed = edited.fillna("").ne(current.fillna("")).any(axis=1)
+                    if not changed.any():
+                        st.info("No changes to save.")
+                    else:
+                        sales_df.loc[changed[changed].index, BULK_EDIT_COLS] = edited[changed]
+                        save_data(sales_df)
+                        st.success(f"Bulk updates saved! ({int(changed.sum())} orders)")
+                        st.rerun()
+
+        manage_orders()
@@ -1,30 +1,46 @@
 """Simple Tkinter Time Tracker
 
 - Tracks start/stop time per project/task
-- Saves records to CSV
+- Saves records to a Feather file (older CSV files are migrated on first run)
 - Shows an editable table of records
 - Shows weekly summary and totals in the dashboard
 - Lets user set a global hourly rate (stored in config.json)
 """
 
+import csv
 import json
 import os
+import time
 from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import pandas as pd
 
-TIME_RECORDS_FILE = "time_records.csv"
+TIME_RECORDS_FILE = "time_records.feather"
+LEGACY_RECORDS_FILE = "time_records.csv"
+EXPORT_FILE = "time_records_export.csv"
+# New records since the last full save are appended here and folded into the Feather file on the next load/save
+JOURNAL_FILE = "time_records_journal.csv"
 CONFIG_FILE = "config.json"
+RECORD_COLUMNS = ["project", "task", "start", "end", "duration", "billable", "hours", "amount"]
+# Typed copies of start/hours/amount kept next to the text records, so the dashboard never re-parses text
+PARSED_COLUMNS = ["start_ts", "hours_num", "amount_num"]
 
 DEFAULT_CONFIG = {"hourly_rate": 300.0}
 
 
+# Parsed config.json keyed on its mtime, so a warm load_config skips the JSON parse
+_CONFIG_CACHE = {"mtime": None, "cfg": None}
+
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, "r") as f:
-                return json.load(f)
+            mtime = os.stat(CONFIG_FILE).st_mtime_ns
+            if _CONFIG_CACHE["mtime"] != mtime:
+                with open(CONFIG_FILE, "r") as f:
+                    _CONFIG_CACHE.update(mtime=mtime, cfg=json.load(f))
+            return dict(_CONFIG_CACHE["cfg"])
         except Exception:
             pass
     return DEFAULT_CONFIG.copy()
@@ -35,6 +51,24 @@ def save_config(cfg):
         json.dump(cfg, f)
 
 
+def write_records(df):
+    # Store native types so reads skip text parsing: bool billable, float hours/amount, and a datetime start_ts
+    # for the dashboard. start/end stay the text they were recorded as (time-only values from very old CSVs
+    # have no date to parse, so a datetime column would turn them into NaT and lose them).
+    start_ts = df["start_ts"] if "start_ts" in df else pd.to_datetime(df["start"], format="ISO8601", errors="coerce")
+    df = df.reindex(columns=RECORD_COLUMNS).reset_index(drop=True)
+    df = df.assign(
+        start=df["start"].fillna("").astype(str),
+        end=df["end"].fillna("").astype(str),
+        duration=df["duration"].astype(str),
+        billable=df["billable"].astype(str).eq("True"),
+        hours=pd.to_numeric(df["hours"], errors="coerce").fillna(0.0),
+        amount=pd.to_numeric(df["amount"], errors="coerce").fillna(0.0),
+        start_ts=pd.to_datetime(start_ts.to_numpy()),
+    )
+    df.to_feather(TIME_RECORDS_FILE)
+
+
 class TimeTrackerApp:
     def __init__(self, root):
         self.root = root
@@ -50,13 +84,27 @@ class TimeTrackerApp:
         self.timer_running = False
         self.start_time = None
         self.current_item_id = None
+        # The on-screen clock ticks off time.monotonic(); start_time (wall clock) is only for the saved record
+        self._start_monotonic = None
+        self._timer_job = None
+
+        # In-memory records (full start/end timestamps); the file is only read once at startup.
+        # Tree rows use the record's index as iid ("row<id>"); new records are buffered in _pending
+        self._df = pd.DataFrame(columns=RECORD_COLUMNS + PARSED_COLUMNS)
+        self._pending = []
+        self._next_id = 0
 
         # Build UI
         self.create_widgets()
-        self.load_records()
-        self.update_dashboard()
+        # Let the window paint first; records and the dashboard fill in once Tk is idle (in this order)
+        self.root.after_idle(self.load_records)
+        self.root.after_idle(self.update_dashboard)
 
     def create_widgets(self):
+        # Shared look for the action buttons (configured once instead of per widget)
+        style = ttk.Style(self.root)
+        style.configure("Action.TButton", width=18)
+
         # Top controls
         top_frame = ttk.Frame(self.root)
         top_frame.pack(fill="x", padx=10, pady=8)
@@ -124,12 +172,9 @@ class TimeTrackerApp:
         action_frame = ttk.Frame(lower_frame)
         action_frame.pack(side="right", fill="y", padx=10, pady=6)
 
-        ttk.Button(action_frame, text="Edit Selected", command=self.edit_selected, width=18).pack(pady=4)
-        ttk.Button(action_frame, text="Delete Selected", command=self.delete_selected, width=18).pack(pady=4)
-        ttk.Button(action_frame, text="Export CSV", command=self.export_csv, width=18).pack(pady=4)
-        ttk.Separator(action_frame, orient="horizontal").pack(fill="x", pady=6)
-        ttk.Label(action_frame, text=f"Rate: ${self.config['hourly_rate']:.2f}/hr").pack(pady=2)
-        ttk.Button(action_frame, text="Set Hourly Rate", command=self.set_hourly_rate, width=18).pack(pady=2)
+        # (rate label and Set Hourly Rate live in the top bar only; the copy here never updated after a rate change)
+        for text, command in [("Edit Selected", self.edit_selected), ("Delete Selected", self.delete_selected), ("Export CSV", self.export_csv)]:
+            ttk.Button(action_frame, text=text, command=command, style="Action.TButton").pack(pady=4)
 
     # Timer control
     def toggle_timer(self):
@@ -144,6 +189,7 @@ class TimeTrackerApp:
             return
         self.timer_running = True
         self.start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
         self.start_stop_button.config(text="Stop")
         self.update_timer()
 
@@ -151,6 +197,10 @@ class TimeTrackerApp:
         if not self.timer_running:
             return
         self.timer_running = False
+        if self._timer_job is not None:
+            # Drop the pending tick so a quick Start doesn't end up with two tick chains
+            self.root.after_cancel(self._timer_job)
+            self._timer_job = None
         end_time = datetime.now()
         duration = end_time - self.start_time
         hours = duration.total_seconds() / 3600.0
@@ -170,101 +220,126 @@ class TimeTrackerApp:
             "amount": f"{amount:.2f}"
         }
         self.add_record(record)
-        self.save_records()
+        self._append_record_to_disk(record)
         self.start_stop_button.config(text="Start")
         self.timer_label.config(text="00:00:00")
 
     def update_timer(self):
         if not self.timer_running:
             return
-        elapsed = datetime.now() - self.start_time
         # Format as HH:MM:SS
-        total_seconds = int(elapsed.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        self.timer_label.config(text=f"{hours:02}:{minutes:02}:{seconds:02}")
-        self.root.after(1000, self.update_timer)
+        s = int(time.monotonic() - self._start_monotonic)
+        self.timer_label.config(text=f"{s // 3600:02}:{(s // 60) % 60:02}:{s % 60:02}")
+        self._timer_job = self.root.after(1000, self.update_timer)
 
     # Records management
+    def records(self):
+        # Authoritative table of all records; folds buffered adds in first
+        if self._pending:
+            ids, recs = zip(*self._pending)
+            new = pd.DataFrame(list(recs), index=list(ids), columns=RECORD_COLUMNS)
+            new["start_ts"] = pd.to_datetime(new["start"], format="ISO8601", errors="coerce")
+            new["hours_num"] = pd.to_numeric(new["hours"], errors="coerce").fillna(0.0)
+            new["amount_num"] = pd.to_numeric(new["amount"], errors="coerce").fillna(0.0)
+            self._df = new if self._df.empty else pd.concat([self._df, new])
+            self._pending = []
+        return self._df
+
     def add_record(self, record):
-        # Format times to show HH:MM:SS only in display
-        start_parts = record["start"].split(" ") if record["start"] else ["", "00:00:00"]
-        end_parts = record["end"].split(" ") if record["end"] else ["", "00:00:00"]
-        start_display = start_parts[1] if len(start_parts) > 1 else "00:00:00"
-        end_display = end_parts[1] if len(end_parts) > 1 else "00:00:00"
+        rid = self._next_id
+        self._next_id += 1
+        self._pending.append((rid, record))
+        self.insert_row(rid, record)
+
+    def insert_row(self, rid, record):
+        # Format times to show HH:MM:SS only in display ("YYYY-MM-DD HH:MM:SS" -> slice, no split)
+        start_display = record["start"][11:19] if len(record["start"]) >= 19 else "00:00:00"
+        end_display = record["end"][11:19] if len(record["end"]) >= 19 else "00:00:00"
         
         values = (record["project"], record["task"], start_display, end_display, record["duration"], record["billable"], record["hours"], record["amount"])
-        # Use index from dataframe as row ID
-        idx = len(self.tree.get_children())
-        self.tree.insert("", "end", iid=f"row{idx}", values=values)
+        self.tree.insert("", "end", iid=f"row{rid}", values=values)
+
+    def migrate_csv(self):
+        # One-time migration: carry the old CSV records over to Feather, then set the CSV aside as a backup
+        try:
+            # One stat instead of reading the file: no larger than a bare header line means there are no records
+            has_rows = os.path.getsize(LEGACY_RECORDS_FILE) > len(",".join(RECORD_COLUMNS) + "\r\n")
+            df = pd.read_csv(LEGACY_RECORDS_FILE) if has_rows else pd.DataFrame(columns=RECORD_COLUMNS)
+            write_records(df)
+            os.replace(LEGACY_RECORDS_FILE, LEGACY_RECORDS_FILE + ".bak")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to migrate {LEGACY_RECORDS_FILE}: {e}")
+
+    def insert_rows(self, rows):
+        # Bulk insert: one Tcl script for all (rid, values) rows instead of a tree.insert call per row.
+        # tk._join quotes each word the same way tkinter does for tree.insert
+        script = "\n".join(
+            tk._join((self.tree._w, "insert", "", "end", "-id", f"row{rid}", "-values", values))
+            for rid, values in rows
+        )
+        if script:
+            self.tree.tk.eval(script)
 
     def load_records(self):
-        if not os.path.exists(TIME_RECORDS_FILE):
-            return
+        if not os.path.exists(TIME_RECORDS_FILE) and os.path.exists(LEGACY_RECORDS_FILE):
+            self.migrate_csv()
         try:
-            # Check if file is empty or contains only whitespace
-            with open(TIME_RECORDS_FILE, 'r') as f:
-                content = f.read().strip()
-                if not content:
-                    return  # File is empty, nothing to load
-            df = pd.read_csv(TIME_RECORDS_FILE)
-            for idx, row in df.iterrows():
-                rec = {
-                    "project": row.get("project", ""),
-                    "task": row.get("task", ""),
-                    "start": row.get("start", ""),
-                    "end": row.get("end", ""),
-                    "duration": row.get("duration", ""),
-                    "billable": str(row.get("billable", "False")),
-                    "hours": f"{row.get('hours', 0):.3f}",
-                    "amount": f"{row.get('amount', 0):.2f}"
-                }
-                self.add_record(rec)
+            if os.path.exists(TIME_RECORDS_FILE):
+                df = pd.read_feather(TIME_RECORDS_FILE)
+                # hours/amount/billable are stored natively; the tree and edit dialog work with text.
+                # Format whole columns at once instead of building a dict per row
+                self._df = pd.DataFrame({
+                    "project": df["project"].fillna(""),
+                    "task": df["task"].fillna(""),
+                    "start": df["start"],
+                    "end": df["end"],
+                    "duration": df["duration"].fillna(""),
+                    "billable": df["billable"].astype(str),
+                    "hours": df["hours"].map("{:.3f}".format),
+                    "amount": df["amount"].map("{:.2f}".format),
+                    "start_ts": df["start_ts"],
+                    "hours_num": df["hours"],
+                    "amount_num": df["amount"],
+                }, columns=RECORD_COLUMNS + PARSED_COLUMNS)
+                self._next_id = len(self._df)
+                # The tree only shows the time of day (same slice as insert_row)
+                start, end = self._df["start"], self._df["end"]
+                shown = self._df[RECORD_COLUMNS].assign(
+                    start=start.str.slice(11, 19).where(start.str.len() >= 19, "00:00:00"),
+                    end=end.str.slice(11, 19).where(end.str.len() >= 19, "00:00:00"),
+                )
+                self.insert_rows(enumerate(shown.itertuples(index=False, name=None)))
+            if os.path.exists(JOURNAL_FILE):
+                # Journal rows are already in record (text) form; fold them into the Feather file once
+                with open(JOURNAL_FILE, newline="", encoding="utf-8") as f:
+                    for rec in csv.DictReader(f):
+                        self.add_record(rec)
+                self.save_records()
+            self.records()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load records: {e}")
 
     def save_records(self):
-        # write all records from tree to CSV
-        rows = []
-        df_orig = pd.DataFrame()  # Default to empty dataframe
-        
-        if os.path.exists(TIME_RECORDS_FILE):
-            try:
-                # Check if file is empty or contains only whitespace
-                with open(TIME_RECORDS_FILE, 'r') as f:
-                    content = f.read().strip()
-                    if content:
-                        df_orig = pd.read_csv(TIME_RECORDS_FILE)
-            except Exception:
-                pass  # If reading fails, use empty dataframe
-        
-        for idx, iid in enumerate(self.tree.get_children()):
-            vals = self.tree.item(iid, "values")
-            # Get original full datetime from CSV
-            orig_start, orig_end = vals[2], vals[3]
-            if not df_orig.empty and idx < len(df_orig):
-                orig_start = df_orig.iloc[idx]["start"]
-                orig_end = df_orig.iloc[idx]["end"]
-            
-            row = {
-                "project": vals[0],
-                "task": vals[1],
-                "start": orig_start,
-                "end": orig_end,
-                "duration": vals[4],
-                "billable": vals[5],
-                "hours": float(vals[6]),
-                "amount": float(vals[7])
-            }
-            rows.append(row)
-        
+        # Full rewrite of the in-memory records to Feather (edit/delete); this also compacts the journal
         try:
-            df = pd.DataFrame(rows)
-            df.to_csv(TIME_RECORDS_FILE, index=False)
+            write_records(self.records())
+            if os.path.exists(JOURNAL_FILE):
+                os.remove(JOURNAL_FILE)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save records: {e}")
 
+    def _append_record_to_disk(self, record):
+        # O(1) write for a new record: one CSV line in the journal, no DataFrame round-trip
+        try:
+            new_file = not os.path.exists(JOURNAL_FILE) or os.path.getsize(JOURNAL_FILE) == 0
+            with open(JOURNAL_FILE, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(RECORD_COLUMNS)
+                writer.writerow([record[c] for c in RECORD_COLUMNS])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save record: {e}")
+
     def edit_selected(self):
         sel = self.tree.selection()
         if not sel:
@@ -273,17 +348,12 @@ class TimeTrackerApp:
         self.edit_record(sel[0])
 
     def edit_record(self, item_id):
-        item = self.tree.item(item_id)
-        vals = item["values"]
-        
-        # Get row index and original datetime from CSV
-        row_idx = int(item_id.replace("row", ""))
-        df_orig = pd.read_csv(TIME_RECORDS_FILE) if os.path.exists(TIME_RECORDS_FILE) else pd.DataFrame()
-        full_start = vals[2]
-        full_end = vals[3]
-        if not df_orig.empty and row_idx < len(df_orig):
-            full_start = df_orig.iloc[row_idx]["start"]
-            full_end = df_orig.iloc[row_idx]["end"]
+        # Read the record from the in-memory store, not the tree (no Tcl round-trip, and full start/end
+        # timestamps where the tree only shows times)
+        rid = int(item_id.replace("row", ""))
+        vals = self.records().loc[rid, RECORD_COLUMNS].tolist()
+        full_start = vals[2] if isinstance(vals[2], str) and vals[2] else "00:00:00"
+        full_end = vals[3] if isinstance(vals[3], str) and vals[3] else "00:00:00"
         
         # Ensure full_start and full_end have date+time format
         # If only time is available, prepend today's date
@@ -326,9 +396,12 @@ class TimeTrackerApp:
                 dur = e - s
                 hours = dur.total_seconds() / 3600.0
                 amount = hours * self.config.get("hourly_rate", DEFAULT_CONFIG["hourly_rate"]) if bill.get() else 0.0
-                start_display = start_e.get().split(" ")[1]
-                end_display = end_e.get().split(" ")[1]
-                self.tree.item(item_id, values=(proj.get().strip(), task.get().strip(), start_display, end_display, str(dur).split('.')[0], str(bill.get()), f"{hours:.3f}", f"{amount:.2f}"))
+                start_display = start_e.get()[11:19]
+                end_display = end_e.get()[11:19]
+                values = (proj.get().strip(), task.get().strip(), start_display, end_display, str(dur).split('.')[0], str(bill.get()), f"{hours:.3f}", f"{amount:.2f}")
+                self.tree.item(item_id, values=values)
+                self._df.loc[rid, RECORD_COLUMNS] = [values[0], values[1], start_e.get(), end_e.get(), *values[4:]]
+                self._df.loc[rid, PARSED_COLUMNS] = [pd.Timestamp(s), round(hours, 3), round(amount, 2)]
                 self.save_records()
                 edit_win.destroy()
                 self.update_dashboard()
@@ -344,15 +417,22 @@ class TimeTrackerApp:
             return
         if not messagebox.askyesno("Confirm", "Delete selected record(s)?"):
             return
+        self.records()
         for iid in sel:
             self.tree.delete(iid)
+            self._df = self._df.drop(index=int(iid.replace("row", "")))
         self.save_records()
         self.update_dashboard()
 
     def export_csv(self):
-        # just re-save to file and notify where
+        # Records live in Feather now; write a CSV copy for spreadsheets and notify where
         self.save_records()
-        messagebox.showinfo("Export", f"Saved to {os.path.abspath(TIME_RECORDS_FILE)}")
+        try:
+            self.records()[RECORD_COLUMNS].to_csv(EXPORT_FILE, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export records: {e}")
+            return
+        messagebox.showinfo("Export", f"Saved to {os.path.abspath(EXPORT_FILE)}")
 
     def set_hourly_rate(self):
         val = simpledialog.askfloat("Hourly Rate", "Set hourly rate ($):", initialvalue=self.config.get("hourly_rate", DEFAULT_CONFIG["hourly_rate"]))
@@ -364,24 +444,16 @@ class TimeTrackerApp:
         self.update_dashboard()
 
     def update_dashboard(self):
-        # Read CSV and summarize last 7 days and current week
-        if not os.path.exists(TIME_RECORDS_FILE):
+        # Summarize last 7 days and current week from the in-memory records
+        if self.records().empty:
             self.dashboard_text.delete("1.0", tk.END)
             self.dashboard_text.insert(tk.END, "No records yet.")
             return
         try:
-            # Check if file is empty or contains only whitespace
-            with open(TIME_RECORDS_FILE, 'r') as f:
-                content = f.read().strip()
-                if not content:
-                    self.dashboard_text.delete("1.0", tk.END)
-                    self.dashboard_text.insert(tk.END, "No records yet.")
-                    return
-            
-            df = pd.read_csv(TIME_RECORDS_FILE, parse_dates=["start", "end"])
-            # Ensure proper typing
-            df["hours"] = pd.to_numeric(df["hours"], errors="coerce").fillna(0.0)
-            df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+            # Only the columns the dashboard needs, already typed when records were loaded/added
+            # (start is NaT for time-only starts from old files)
+            df = self.records()[["project", "task"] + PARSED_COLUMNS]
+            df.columns = ["project", "task", "start", "hours", "amount"]
 
             now = datetime.now()
             seven_days_ago = now - timedelta(days=6)
@@ -405,10 +477,11 @@ class TimeTrackerApp:
 
             # Show most recent records
             text.append('\nMost recent records:\n')
-            recent = df.sort_values("start", ascending=False).head(10)
-            for _, r in recent.iterrows():
-                s = pd.to_datetime(r["start"]).strftime("%Y-%m-%d %H:%M") if not pd.isnull(r["start"]) else r["start"]
-                text.append(f"{s} — {r['project']} / {r['task']} — {r['hours']:.3f} hrs — ${r['amount']:.2f}\n")
+            # Partial selection of the top 10 instead of sorting the whole history
+            recent = df.nlargest(10, "start")
+            starts = recent["start"].dt.strftime("%Y-%m-%d %H:%M").fillna("NaT").to_numpy()
+            for s, proj, task, hrs, amt in zip(starts, recent["project"], recent["task"], recent["hours"], recent["amount"]):
+                text.append(f"{s} — {proj} / {task} — {hrs:.3f} hrs — ${amt:.2f}\n")
 
             self.dashboard_text.delete("1.0", tk.END)
             self.dashboard_text.insert(tk.END, "".join(text))
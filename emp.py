@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import csv
+import functools
 from datetime import datetime, date
 
 # --- CONFIGURATION ---
@@ -11,50 +14,91 @@ FILES = {
     "dtr": "payroll_dtr.csv",
     "leaves": "payroll_leaves.csv"
 }
+# Column order of each payroll CSV (header written by init, rows appended by append_row)
+COLUMNS = {
+    "employees": ["Employee_ID", "Name", "Position", "Start_Date", "Status", "Daily_Rate", "Hourly_Rate", "OT_Rate", "Holiday_Rate"],
+    "dtr": ["Date", "Employee_ID", "Name", "Time_In", "Time_Out", "Reg_Hours", "OT_Hours", "Is_Holiday", "Notes"],
+    "leaves": ["Employee_ID", "Name", "Leave_Date", "Type", "Status"]
+}
+# Columns parsed to datetime64 by read_csv itself (the parsed frame is what gets cached)
+PARSE_DATES = {"dtr": ["Date"]}
+DTR_EDITOR_ROWS = 100  # Latest DTR logs sent to the editor by default
 
 # --- DATABASE INITIALIZATION ---
 def init_db():
     # 1. Employee File
     if not os.path.exists(FILES["employees"]):
-        df = pd.DataFrame(columns=[
-            "Employee_ID", "Name", "Position", "Start_Date", "Status",
-            "Daily_Rate", "Hourly_Rate", "OT_Rate", "Holiday_Rate"
-        ])
-        df.to_csv(FILES["employees"], index=False)
+        pd.DataFrame(columns=COLUMNS["employees"]).to_csv(FILES["employees"], index=False)
     
     # 2. Daily Time Record (DTR) File
     if not os.path.exists(FILES["dtr"]):
-        df = pd.DataFrame(columns=[
-            "Date", "Employee_ID", "Name", "Time_In", "Time_Out", 
-            "Reg_Hours", "OT_Hours", "Is_Holiday", "Notes"
-        ])
-        df.to_csv(FILES["dtr"], index=False)
+        pd.DataFrame(columns=COLUMNS["dtr"]).to_csv(FILES["dtr"], index=False)
 
     # 3. Leaves File
     if not os.path.exists(FILES["leaves"]):
-        df = pd.DataFrame(columns=["Employee_ID", "Name", "Leave_Date", "Type", "Status"])
-        df.to_csv(FILES["leaves"], index=False)
+        pd.DataFrame(columns=COLUMNS["leaves"]).to_csv(FILES["leaves"], index=False)
 
-init_db()
+# Only the first run of a session needs to check the files
+if not st.session_state.get("_db_inited"):
+    init_db()
+    st.session_state._db_inited = True
 
 # --- HELPER FUNCTIONS ---
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(path, mtime, parse_dates=()):
+    return pd.read_csv(path, parse_dates=list(parse_dates), date_format="ISO8601", cache_dates=True)
+
 def load_csv(key):
-    return pd.read_csv(FILES[key])
+    # The file's mtime is part of the cache key, so reruns skip the parse until the file is written
+    return _read_csv_cached(FILES[key], _mtime(FILES[key]), tuple(PARSE_DATES.get(key, ())))
+
+@st.cache_data(show_spinner=False)
+def _employee_ids_cached(path, mtime):
+    # First row wins for a repeated Name, as the old .iloc[0] lookup did
+    emp_df = _read_csv_cached(path, mtime).drop_duplicates("Name")
+    return dict(zip(emp_df["Name"].tolist(), emp_df["Employee_ID"].tolist()))
+
+def employee_ids():
+    # Name -> Employee_ID, built once per employees-file version (dict lookup instead of a Name scan)
+    return _employee_ids_cached(FILES["employees"], _mtime(FILES["employees"]))
 
 def save_csv(key, df):
     df.to_csv(FILES[key], index=False)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
 
-def calculate_tenure(start_date_str):
+def append_row(key, row):
+    # O(1) insert: write one dict row to the end of the CSV, no re-read or rewrite
+    with open(FILES[key], "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=COLUMNS[key]).writerow(row)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
+
+def append_rows(key, rows):
+    # Batch insert: several dict rows in one open + write
+    with open(FILES[key], "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=COLUMNS[key]).writerows(rows)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
+
+@functools.lru_cache(maxsize=None)
+def _tenure(start_date_str, today_ord):
     try:
         start = pd.to_datetime(start_date_str).date()
-        today = date.today()
-        delta = today - start
+        delta = date.fromordinal(today_ord) - start
         years = delta.days // 365
         months = (delta.days % 365) // 30
         return f"{years} yrs, {months} mos"
     except:
         return "N/A"
 
+def calculate_tenure(start_date_str):
+    # Memoized per start date and day: reruns skip the date parse, and midnight rolls the key over
+    return _tenure(start_date_str, date.today().toordinal())
+
 # --- MAIN APP ---
 st.title("🐨 Koala Ledger: Payroll Manager")
 
@@ -89,13 +133,13 @@ with tab_emp:
             if st.form_submit_button("Save Employee"):
                 emp_df = load_csv("employees")
                 new_id = f"EMP-{len(emp_df) + 1:03d}"
-                new_data = pd.DataFrame([{
+                new_data = {
                     "Employee_ID": new_id, "Name": name, "Position": pos,
                     "Start_Date": start_date, "Status": status,
                     "Daily_Rate": daily, "Hourly_Rate": hourly,
                     "OT_Rate": ot_rate, "Holiday_Rate": hol_rate
-                }])
-                save_csv("employees", pd.concat([emp_df, new_data], ignore_index=True))
+                }
+                append_row("employees", new_data)
                 st.success(f"Added {name}!")
                 st.rerun()
 
@@ -131,12 +175,10 @@ with tab_dtr:
                 dtr_date = st.date_input("Date", date.today())
                 
                 # Map Name to ID
-                emp_display = [f"{row['Name']} ({row['Employee_ID']})" for i, row in emp_df.iterrows()]
-                selected_emp_str = st.selectbox("Select Employee", emp_display)
-                
-                # Extract ID and Name
-                sel_name = selected_emp_str.split(" (")[0]
-                sel_id = selected_emp_str.split(" (")[1].replace(")", "")
+                emp_display = (emp_df["Name"].astype(str) + " (" + emp_df["Employee_ID"].astype(str) + ")").tolist()
+                # Select by row position, so ID and Name come straight from the frame (no label parsing)
+                sel_idx = st.selectbox("Select Employee", range(len(emp_display)), format_func=emp_display.__getitem__)
+                sel_name, sel_id = emp_df["Name"].iat[sel_idx], emp_df["Employee_ID"].iat[sel_idx]
 
                 t_in = st.time_input("Time In", value=datetime.strptime("08:00", "%H:%M").time())
                 t_out = st.time_input("Time Out", value=datetime.strptime("17:00", "%H:%M").time())
@@ -160,13 +202,13 @@ with tab_dtr:
                     reg_hours = min(total_hours, 8.0)
                     ot_hours = max(total_hours - 8.0, 0.0)
                     
-                    dtr_entry = pd.DataFrame([{
+                    dtr_entry = {
                         "Date": dtr_date, "Employee_ID": sel_id, "Name": sel_name,
                         "Time_In": t_in, "Time_Out": t_out,
                         "Reg_Hours": reg_hours, "OT_Hours": ot_hours,
                         "Is_Holiday": is_hol, "Notes": notes
-                    }])
-                    save_csv("dtr", pd.concat([load_csv("dtr"), dtr_entry], ignore_index=True))
+                    }
+                    append_row("dtr", dtr_entry)
                     st.success(f"Logged {total_hours} hrs for {sel_name}")
                     st.rerun()
 
@@ -175,16 +217,20 @@ with tab_dtr:
             st.caption("Recent Logs (Editable - Double click to change)")
             dtr_df = load_csv("dtr")
             if not dtr_df.empty:
-                # Ensure Date is datetime for sorting, but keep as string/date for editing if preferred
-                dtr_df["Date"] = pd.to_datetime(dtr_df["Date"]).dt.date
+                # Date is already datetime64 from load_csv (vectorized sort); the editor shows it as a plain date
                 dtr_sorted = dtr_df.sort_values("Date", ascending=False)
                 
+                # Only the latest logs go to the browser unless asked; older rows are kept aside for the save
+                show_all = st.checkbox(f"Show all {len(dtr_sorted)} logs", value=False) if len(dtr_sorted) > DTR_EDITOR_ROWS else True
+                shown = dtr_sorted if show_all else dtr_sorted.head(DTR_EDITOR_ROWS)
+                
                 # Make the dataframe editable
                 edited_dtr = st.data_editor(
-                    dtr_sorted,
+                    shown,
                     width='stretch',
                     hide_index=True,
                     num_rows="dynamic", # Allows adding/deleting rows directly in table
+                    column_config={"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD")},
                     key="dtr_editor"
                 )
 
@@ -192,9 +238,45 @@ with tab_dtr:
                 # Note: st.data_editor automatically updates session state, but we need to save to CSV
                 # We add a save button to confirm changes to disk to avoid constant re-writing on every keystroke
                 if st.button("💾 Save Changes to Logs"):
-                    # Convert dates back to string format for consistent CSV storage if needed
-                    save_csv("dtr", edited_dtr)
-                    st.success("DTR Logs updated successfully!")
+                    # Row hashes of the shown slice vs the editor output: skip the rewrite when nothing was edited
+                    if pd.util.hash_pandas_object(edited_dtr, index=False).equals(pd.util.hash_pandas_object(shown, index=False)):
+                        st.info("No changes to save.")
+                    else:
+                        # Edited slice + the untouched older rows (row adds/deletes in the slice carry over)
+                        save_csv("dtr", pd.concat([edited_dtr, dtr_sorted.iloc[len(shown):]], ignore_index=True))
+                        st.success("DTR Logs updated successfully!")
+
+        # --- BATCH LOG: several staff in one submit ---
+        with st.expander("🗂️ Batch Log (multiple employees)"):
+            with st.form("dtr_batch_form"):
+                batch_date = st.date_input("Date", date.today(), key="batch_date")
+                batch_seed = pd.DataFrame({
+                    "Log": True,
+                    "Employee_ID": emp_df["Employee_ID"].astype(str), "Name": emp_df["Name"].astype(str),
+                    "Time_In": datetime.strptime("08:00", "%H:%M").time(),
+                    "Time_Out": datetime.strptime("17:00", "%H:%M").time(),
+                    "Is_Holiday": False, "Notes": ""
+                })
+                batch = st.data_editor(batch_seed, width='stretch', hide_index=True, disabled=["Employee_ID", "Name"], key="dtr_batch_editor")
+
+                if st.form_submit_button("Log Checked Employees"):
+                    batch = batch[batch["Log"]]
+                    if batch.empty:
+                        st.warning("No employees checked.")
+                    else:
+                        # Same hours rules as the single entry, computed column-wise for the whole batch
+                        total_hours = (pd.to_timedelta(batch["Time_Out"].astype(str)) - pd.to_timedelta(batch["Time_In"].astype(str))).dt.total_seconds() / 3600
+                        total_hours = total_hours.where(total_hours <= 5, total_hours - 1)
+                        batch_rows = batch.drop(columns="Log").assign(
+                            Date=batch_date,
+                            Reg_Hours=total_hours.clip(upper=8.0),
+                            OT_Hours=(total_hours - 8.0).clip(lower=0.0),
+                            Notes=batch["Notes"].fillna("")
+                        )
+                        # One file write for the whole batch
+                        append_rows("dtr", batch_rows.to_dict("records"))
+                        st.success(f"Logged {len(batch_rows)} employees for {batch_date}")
+                        st.rerun()
 
 # ==========================================
 # 3. PAY SUMMARY (Payslip)
@@ -211,9 +293,8 @@ with tab_pay:
         dtr_df = load_csv("dtr")
         emp_df = load_csv("employees")
         
-        # Filter DTR
-        dtr_df["Date"] = pd.to_datetime(dtr_df["Date"]).dt.date
-        mask = (dtr_df["Date"] >= start_pay) & (dtr_df["Date"] <= end_pay)
+        # Filter DTR (Date is parsed to datetime64 at read time, so the period filter is a vectorized compare)
+        mask = (dtr_df["Date"] >= pd.Timestamp(start_pay)) & (dtr_df["Date"] <= pd.Timestamp(end_pay))
         period_dtr = dtr_df.loc[mask]
         
         if period_dtr.empty:
@@ -227,17 +308,19 @@ with tab_pay:
             # 2. OT Pay = OT Hours * Hourly Rate * OT_Rate
             # 3. Holiday Premium logic (Simplified: If Holiday, Reg Hours * (HolRate - 1) is added bonus)
             
-            merged["Base_Pay"] = merged["Reg_Hours"] * merged["Hourly_Rate"]
-            merged["OT_Pay"] = merged["OT_Hours"] * merged["Hourly_Rate"] * merged["OT_Rate"]
+            # (plain numpy arrays: no index alignment per step, and all pay columns are assigned in one go)
+            rate = merged["Hourly_Rate"].to_numpy(dtype=float)
+            base = merged["Reg_Hours"].to_numpy(dtype=float) * rate
+            ot = merged["OT_Hours"].to_numpy(dtype=float) * rate * merged["OT_Rate"].to_numpy(dtype=float)
             
             # If Is_Holiday is True, apply multiplier to Base Pay
             # Logic: If holiday, rate is usually double (2.0). 
             # We already paid 1.0 in Base Pay, so we add the extra (Rate - 1.0)
-            merged["Holiday_Premium"] = merged.apply(
-                lambda x: (x["Reg_Hours"] * x["Hourly_Rate"] * (x["Holiday_Rate"] - 1.0)) if x["Is_Holiday"] else 0, axis=1
-            )
+            # (the flag is compared as text since it may load as str)
+            is_hol = merged["Is_Holiday"].astype(str).str.lower().eq("true").to_numpy()
+            hol = np.where(is_hol, base * (merged["Holiday_Rate"].to_numpy(dtype=float) - 1.0), 0.0)
             
-            merged["Total_Daily_Pay"] = merged["Base_Pay"] + merged["OT_Pay"] + merged["Holiday_Premium"]
+            merged = merged.assign(Base_Pay=base, OT_Pay=ot, Holiday_Premium=hol, Total_Daily_Pay=base + ot + hol)
             
             # Group by Employee
             payroll_summary = merged.groupby(["Employee_ID", "Name"]).agg(
@@ -257,10 +340,10 @@ with tab_pay:
             st.markdown("### 📄 Export for Google Sheets")
             st.caption("Download this CSV and import it into your Google Sheets Payslip Template.")
             
-            csv = payroll_summary.to_csv(index=False).encode('utf-8')
+            csv_bytes = payroll_summary.to_csv(index=False).encode('utf-8')
             st.download_button(
                 "📥 Download Payslip Data (CSV)",
-                data=csv,
+                data=csv_bytes,
                 file_name=f"Payroll_{start_pay}_{end_pay}.csv",
                 mime="text/csv"
             )
@@ -282,13 +365,13 @@ with tab_leave:
                 
                 if st.form_submit_button("File Leave"):
                     # Get ID
-                    e_id = emp_df[emp_df["Name"] == leave_emp].iloc[0]["Employee_ID"]
+                    e_id = employee_ids()[leave_emp]
                     
-                    new_leave = pd.DataFrame([{
+                    new_leave = {
                         "Employee_ID": e_id, "Name": leave_emp, 
                         "Leave_Date": leave_date, "Type": l_type, "Status": "Approved"
-                    }])
-                    save_csv("leaves", pd.concat([load_csv("leaves"), new_leave], ignore_index=True))
+                    }
+                    append_row("leaves", new_leave)
                     st.success("Leave Filed!")
     
     with c2:
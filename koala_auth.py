@@ -0,0 +1,32 @@
+import os
+import hashlib
+import hmac
+import streamlit as st
+
+# Shared password helpers for app.py and moon.py.
+# Passwords come from env vars or .streamlit/secrets.toml; none ships with the code.
+
+
+def secret(name):
+    # Env var first, then .streamlit/secrets.toml; None if neither sets it
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        return st.secrets.get(name)
+    except FileNotFoundError:
+        return None
+
+
+def _digest(pw):
+    return hashlib.sha256(pw.encode()).digest()
+
+
+def password_hash(name):
+    # Only the digest is kept in memory; None when the password isn't configured
+    pw = secret(name)
+    return _digest(pw) if pw else None
+
+
+def password_matches(entered, pw_hash):
+    # Unset password = locked (fail closed); otherwise a constant-time digest compare
+    return pw_hash is not None and hmac.compare_digest(_digest(entered), pw_hash)
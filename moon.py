@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
 import os
+import csv
 from datetime import datetime, date
+from koala_auth import password_hash, password_matches
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Koala Management System", layout="wide")
 
 # --- GLOBAL CONSTANTS & CONFIG ---
-ADMIN_PASSWORD = "Moonshine88"  # Password for the Admin Section
+# Admin Section password (KOALA_ADMIN_PW, env var or secrets.toml); only its digest is kept in memory
+ADMIN_PW_HASH = password_hash("KOALA_ADMIN_PW")
 TIERS = {"Tier 1 (₱125)": 125, "Tier 2 (₱150)": 150}
 
 # Define all file paths
@@ -17,6 +20,61 @@ FILES = {
     "dtr": "payroll_dtr.csv",
     "leaves": "payroll_leaves.csv"
 }
+# Column order of each payroll CSV (header written by init, rows appended by append_row)
+COLUMNS = {
+    "employees": ["Employee_ID", "Name", "Position", "Start_Date", "Status", "Daily_Rate", "Hourly_Rate", "OT_Rate", "Holiday_Rate"],
+    "dtr": ["Date", "Employee_ID", "Name", "Time_In", "Time_Out", "Reg_Hours", "OT_Hours", "Is_Holiday", "Notes"],
+    "leaves": ["Employee_ID", "Name", "Leave_Date", "Type", "Status"]
+}
+DTR_EDITOR_ROWS = 100  # Latest DTR logs sent to the editor by default
+
+# --- HELPER FUNCTIONS ---
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(path, mtime):
+    return pd.read_csv(path, dtype=str).fillna("")
+
+def load_csv(key):
+    # General loader (cached until the file's mtime changes)
+    return _read_csv_cached(FILES[key], _mtime(FILES[key]))
+
+def load_sales_data():
+    # Specific loader for sales
+    df = pd.read_csv(FILES["sales"], dtype={"Notes": str, "Contact": str, "Order_ID": str, "Work_Status": str, "Payment_Status": str})
+    df["Notes"] = df["Notes"].fillna("")
+    df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    return df
+
+@st.cache_data(show_spinner=False)
+def _employee_ids_cached(path, mtime):
+    # First row wins for a repeated Name, as the old .iloc[0] lookup did
+    emp_df = _read_csv_cached(path, mtime).drop_duplicates("Name")
+    return dict(zip(emp_df["Name"].tolist(), emp_df["Employee_ID"].tolist()))
+
+def employee_ids():
+    # Name -> Employee_ID, built once per employees-file version (dict lookup instead of a Name scan)
+    return _employee_ids_cached(FILES["employees"], _mtime(FILES["employees"]))
+
+def save_csv(key, df):
+    df.to_csv(FILES[key], index=False)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
+
+def append_row(key, row):
+    # O(1) insert: write one dict row to the end of the CSV, no re-read or rewrite
+    with open(FILES[key], "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=COLUMNS[key]).writerow(row)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
+
+def append_rows(key, rows):
+    # Batch insert: several dict rows in one open + write
+    with open(FILES[key], "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=COLUMNS[key]).writerows(rows)
+    _read_csv_cached.clear()
+    _employee_ids_cached.clear()
 
 # --- DATABASE INITIALIZATION ---
 def init_all_dbs():
@@ -31,41 +89,20 @@ def init_all_dbs():
     
     # 2. Employee DB
     if not os.path.exists(FILES["employees"]):
-        df = pd.DataFrame(columns=[
-            "Employee_ID", "Name", "Position", "Start_Date", "Status",
-            "Daily_Rate", "Hourly_Rate", "OT_Rate", "Holiday_Rate"
-        ])
-        df.to_csv(FILES["employees"], index=False)
+        pd.DataFrame(columns=COLUMNS["employees"]).to_csv(FILES["employees"], index=False)
     
     # 3. DTR DB
     if not os.path.exists(FILES["dtr"]):
-        df = pd.DataFrame(columns=[
-            "Date", "Employee_ID", "Name", "Time_In", "Time_Out", 
-            "Reg_Hours", "OT_Hours", "Is_Holiday", "Notes"
-        ])
-        df.to_csv(FILES["dtr"], index=False)
+        pd.DataFrame(columns=COLUMNS["dtr"]).to_csv(FILES["dtr"], index=False)
 
     # 4. Leaves DB
     if not os.path.exists(FILES["leaves"]):
-        df = pd.DataFrame(columns=["Employee_ID", "Name", "Leave_Date", "Type", "Status"])
-        df.to_csv(FILES["leaves"], index=False)
-
-init_all_dbs()
-
-# --- HELPER FUNCTIONS ---
-def load_csv(key):
-    # General loader
-    return pd.read_csv(FILES[key], dtype=str).fillna("")
-
-def load_sales_data():
-    # Specific loader for sales
-    df = pd.read_csv(FILES["sales"], dtype={"Notes": str, "Contact": str, "Order_ID": str, "Work_Status": str, "Payment_Status": str})
-    df["Notes"] = df["Notes"].fillna("")
-    df["Date"] = pd.to_datetime(df["Date"]).dt.date
-    return df
+        pd.DataFrame(columns=COLUMNS["leaves"]).to_csv(FILES["leaves"], index=False)
 
-def save_csv(key, df):
-    df.to_csv(FILES[key], index=False)
+# Only the first run of a session needs to check the files
+if not st.session_state.get("_db_inited"):
+    init_all_dbs()
+    st.session_state._db_inited = True
 
 def calculate_tenure(start_date_str):
     try:
@@ -328,9 +365,11 @@ elif app_mode == "🔐 Admin & Payroll":
 
     if not st.session_state.admin_unlocked:
         st.title("🔐 Admin Access Required")
+        if ADMIN_PW_HASH is None:
+            st.error("🔒 No admin password is configured. Set KOALA_ADMIN_PW as an environment variable or in .streamlit/secrets.toml.")
         pwd = st.text_input("Enter Admin Password", type="password")
         if st.button("Login"):
-            if pwd == ADMIN_PASSWORD:
+            if password_matches(pwd, ADMIN_PW_HASH):
                 st.session_state.admin_unlocked = True
                 st.rerun()
             else:
@@ -374,13 +413,13 @@ elif app_mode == "🔐 Admin & Payroll":
                         else:
                             emp_df = load_csv("employees")
                             new_id = f"EMP-{len(emp_df) + 1:03d}"
-                            new_data = pd.DataFrame([{
+                            new_data = {
                                 "Employee_ID": new_id, "Name": name, "Position": pos,
                                 "Start_Date": start_date, "Status": status,
                                 "Daily_Rate": daily, "Hourly_Rate": hourly,
                                 "OT_Rate": ot_rate, "Holiday_Rate": hol_rate
-                            }])
-                            save_csv("employees", pd.concat([emp_df, new_data], ignore_index=True))
+                            }
+                            append_row("employees", new_data)
                             st.success(f"✅ Added {name}")
                             st.rerun()
 
@@ -425,10 +464,9 @@ elif app_mode == "🔐 Admin & Payroll":
                 with c1:
                     with st.form("admin_dtr_form"):
                         dtr_date = st.date_input("Date", date.today())
-                        emp_list = [f"{r['Name']} ({r['Employee_ID']})" for _, r in emp_df.iterrows()]
-                        sel_emp = st.selectbox("Employee", emp_list)
-                        sel_name = sel_emp.split(" (")[0]
-                        sel_id = sel_emp.split(" (")[1].replace(")", "")
+                        emp_list = (emp_df["Name"] + " (" + emp_df["Employee_ID"] + ")").tolist()
+                        sel_idx = st.selectbox("Employee", range(len(emp_list)), format_func=emp_list.__getitem__)
+                        sel_name, sel_id = emp_df["Name"].iat[sel_idx], emp_df["Employee_ID"].iat[sel_idx]
                         
                         t_in = st.time_input("In", value=datetime.strptime("08:00", "%H:%M").time())
                         t_out = st.time_input("Out", value=datetime.strptime("17:00", "%H:%M").time())
@@ -437,8 +475,7 @@ elif app_mode == "🔐 Admin & Payroll":
                         
                         if st.form_submit_button("Log Time"):
                             # Check Dupes
-                            dtr_check = load_csv("dtr")
-                            dtr_check["Date"] = dtr_check["Date"].astype(str)
+                            dtr_check = load_csv("dtr")  # already all-str (dtype=str + fillna)
                             if not dtr_check[(dtr_check["Employee_ID"] == sel_id) & (dtr_check["Date"] == str(dtr_date))].empty:
                                 st.error("Log already exists.")
                             else:
@@ -449,27 +486,63 @@ elif app_mode == "🔐 Admin & Payroll":
                                 reg = min(hrs, 10.0)
                                 ot = max(hrs - 10.0, 0.0)
                                 
-                                new_log = pd.DataFrame([{
+                                # Plain dict straight to the CSV (corrections go through the log editor on the right)
+                                append_row("dtr", {
                                     "Date": dtr_date, "Employee_ID": sel_id, "Name": sel_name,
                                     "Time_In": t_in, "Time_Out": t_out, "Reg_Hours": reg,
                                     "OT_Hours": ot, "Is_Holiday": is_hol, "Notes": notes
-                                }])
-                                # Let user edit the new entry before saving
-                                edited_log = st.data_editor(new_log, width='stretch', hide_index=True)
-                                # Use the edited result as the new_log to be saved
-                                new_log = edited_log
-                                save_csv("dtr", pd.concat([load_csv("dtr"), new_log], ignore_index=True))
+                                })
                                 st.success("Logged!")
                                 st.rerun()
 
                 with c2:
                     dtr_df = load_csv("dtr")
                     if not dtr_df.empty:
-                        dtr_df["Date"] = pd.to_datetime(dtr_df["Date"]).dt.date
-                        edited_dtr = st.data_editor(dtr_df.sort_values("Date", ascending=False), num_rows="dynamic", width='stretch', hide_index=True)
+                        # Keep Date as datetime64 (vectorized sort); the editor shows it as a plain date
+                        dtr_df["Date"] = pd.to_datetime(dtr_df["Date"], format="ISO8601", cache=True)
+                        dtr_sorted = dtr_df.sort_values("Date", ascending=False)
+                        # Only the latest logs go to the browser unless asked; older rows are kept aside for the save
+                        show_all = st.checkbox(f"Show all {len(dtr_sorted)} logs", value=False) if len(dtr_sorted) > DTR_EDITOR_ROWS else True
+                        shown = dtr_sorted if show_all else dtr_sorted.head(DTR_EDITOR_ROWS)
+                        edited_dtr = st.data_editor(shown, num_rows="dynamic", width='stretch', hide_index=True, column_config={"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD")})
                         if st.button("💾 Save Logs"):
-                            save_csv("dtr", edited_dtr)
-                            st.success("Saved!")
+                            # Skip the rewrite when the editor output hashes the same as what was shown
+                            if pd.util.hash_pandas_object(edited_dtr, index=False).equals(pd.util.hash_pandas_object(shown, index=False)):
+                                st.info("No changes to save.")
+                            else:
+                                save_csv("dtr", pd.concat([edited_dtr, dtr_sorted.iloc[len(shown):]], ignore_index=True))
+                                st.success("Saved!")
+
+                # --- BATCH LOG: several staff in one submit ---
+                with st.expander("🗂️ Batch Log"):
+                    with st.form("admin_dtr_batch_form"):
+                        batch_date = st.date_input("Date", date.today(), key="batch_date")
+                        batch_seed = pd.DataFrame({
+                            "Log": True, "Employee_ID": emp_df["Employee_ID"], "Name": emp_df["Name"],
+                            "Time_In": datetime.strptime("08:00", "%H:%M").time(),
+                            "Time_Out": datetime.strptime("17:00", "%H:%M").time(),
+                            "Is_Holiday": False, "Notes": ""
+                        })
+                        batch = st.data_editor(batch_seed, width='stretch', hide_index=True, disabled=["Employee_ID", "Name"], key="dtr_batch_editor")
+                        
+                        if st.form_submit_button("Log Checked Employees"):
+                            # Skip anyone already logged for that date (same dupe rule as the single entry)
+                            dtr_check = load_csv("dtr")
+                            logged = dtr_check.loc[dtr_check["Date"] == str(batch_date), "Employee_ID"]
+                            batch = batch[batch["Log"] & ~batch["Employee_ID"].isin(logged)]
+                            if batch.empty:
+                                st.warning("Nothing to log (none checked, or all already logged).")
+                            else:
+                                hrs = (pd.to_timedelta(batch["Time_Out"].astype(str)) - pd.to_timedelta(batch["Time_In"].astype(str))).dt.total_seconds() / 3600
+                                hrs = hrs.where(hrs <= 5, hrs - 0.5)
+                                batch_rows = batch.drop(columns="Log").assign(
+                                    Date=batch_date, Reg_Hours=hrs.clip(upper=10.0), OT_Hours=(hrs - 10.0).clip(lower=0.0),
+                                    Notes=batch["Notes"].fillna("")
+                                )
+                                # One file write for the whole batch
+                                append_rows("dtr", batch_rows.to_dict("records"))
+                                st.success(f"Logged {len(batch_rows)} staff!")
+                                st.rerun()
 
         # --- ADMIN: PAY SUMMARY ---
         with tab_pay:
@@ -485,11 +558,12 @@ elif app_mode == "🔐 Admin & Payroll":
                 cols = ["Daily_Rate", "Hourly_Rate", "OT_Rate", "Holiday_Rate"]
                 for c in cols: emp_df[c] = pd.to_numeric(emp_df[c], errors='coerce').fillna(0)
                 
-                dtr_df["Date"] = pd.to_datetime(dtr_df["Date"]).dt.date
+                # Keep Date as datetime64 so the period filter is a vectorized compare, not per-row date objects
+                dtr_df["Date"] = pd.to_datetime(dtr_df["Date"], format="ISO8601", cache=True)
                 dtr_df["Reg_Hours"] = pd.to_numeric(dtr_df["Reg_Hours"], errors='coerce').fillna(0)
                 dtr_df["OT_Hours"] = pd.to_numeric(dtr_df["OT_Hours"], errors='coerce').fillna(0)
                 
-                mask = (dtr_df["Date"] >= start_pay) & (dtr_df["Date"] <= end_pay)
+                mask = (dtr_df["Date"] >= pd.Timestamp(start_pay)) & (dtr_df["Date"] <= pd.Timestamp(end_pay))
                 period = dtr_df.loc[mask]
                 
                 if period.empty:
@@ -498,7 +572,9 @@ elif app_mode == "🔐 Admin & Payroll":
                     merged = pd.merge(period, emp_df, on="Employee_ID", how="left", suffixes=("", "_ref"))
                     merged["Base_Pay"] = merged["Reg_Hours"] * merged["Hourly_Rate"]
                     merged["OT_Pay"] = merged["OT_Hours"] * merged["Hourly_Rate"] * merged["OT_Rate"]
-                    merged["Hol_Prem"] = merged.apply(lambda x: (x["Reg_Hours"]*x["Hourly_Rate"]*(x["Holiday_Rate"]-1)) if x["Is_Holiday"] else 0, axis=1)
+                    # Holiday premium column-wise with a mask (Is_Holiday loads as "True"/"False" text, which a per-row truth test got wrong)
+                    is_hol = merged["Is_Holiday"].str.lower().eq("true")
+                    merged["Hol_Prem"] = (merged["Reg_Hours"] * merged["Hourly_Rate"] * (merged["Holiday_Rate"] - 1)).where(is_hol, 0.0)
                     merged["Total"] = merged["Base_Pay"] + merged["OT_Pay"] + merged["Hol_Prem"]
                     
                     summary = merged.groupby(["Employee_ID", "Name"]).agg(
@@ -517,9 +593,9 @@ elif app_mode == "🔐 Admin & Payroll":
                     l_date = st.date_input("Date")
                     l_type = st.selectbox("Type", ["Sick", "Vacation", "Emergency"])
                     if st.form_submit_button("File"):
-                        eid = emp_df[emp_df["Name"] == l_emp].iloc[0]["Employee_ID"]
-                        new_l = pd.DataFrame([{"Employee_ID": eid, "Name": l_emp, "Leave_Date": l_date, "Type": l_type, "Status": "Approved"}])
-                        save_csv("leaves", pd.concat([load_csv("leaves"), new_l], ignore_index=True))
+                        eid = employee_ids()[l_emp]
+                        new_l = {"Employee_ID": eid, "Name": l_emp, "Leave_Date": l_date, "Type": l_type, "Status": "Approved"}
+                        append_row("leaves", new_l)
                         st.success("Filed!")
                         st.rerun()
             
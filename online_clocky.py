@@ -9,6 +9,7 @@ Usage: run `streamlit run online_clocky.py` in the `KoalaLiteLaundry` folder.
 """
 
 import os
+import csv
 import json
 from datetime import datetime, timedelta
 
@@ -21,11 +22,17 @@ CONFIG_FILE = "online_config.json"
 DEFAULT_CONFIG = {"hourly_rate": 300.0}
 
 
+@st.cache_data(show_spinner=False)
+def _read_config(path, mtime):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, "r") as f:
-                return json.load(f)
+            # The mtime is part of the cache key, so reruns skip the JSON parse until the file is written
+            return _read_config(CONFIG_FILE, os.stat(CONFIG_FILE).st_mtime_ns)
         except Exception:
             pass
     return DEFAULT_CONFIG.copy()
@@ -34,17 +41,39 @@ def load_config():
 def save_config(cfg):
     with open(CONFIG_FILE, "w") as f:
         json.dump(cfg, f)
+    _read_config.clear()
+
+
+@st.cache_data(show_spinner=False)
+def _read_records(path, mtime):
+    return pd.read_csv(path)
 
 
 def load_records():
     if not os.path.exists(TIME_RECORDS_FILE):
         return pd.DataFrame(columns=["project", "task", "start", "end", "duration", "billable", "hours", "amount"])
-    df = pd.read_csv(TIME_RECORDS_FILE)
-    return df
+    # The file's mtime is part of the cache key, so reruns skip the parse until the file is written
+    return _read_records(TIME_RECORDS_FILE, os.path.getmtime(TIME_RECORDS_FILE))
 
 
 def save_records(df: pd.DataFrame):
     df.to_csv(TIME_RECORDS_FILE, index=False)
+    _read_records.clear()
+
+
+def append_record(rec: dict):
+    # O(1) insert: append one row under the file's existing header, no re-read or rewrite
+    header = []
+    if os.path.exists(TIME_RECORDS_FILE):
+        with open(TIME_RECORDS_FILE, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+    if header and set(rec) <= set(header):
+        with open(TIME_RECORDS_FILE, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=header).writerow(rec)
+        _read_records.clear()
+    else:
+        # New file or a new column: full rewrite so the header stays complete
+        save_records(pd.concat([load_records(), pd.DataFrame([rec])], ignore_index=True, sort=False))
 
 
 def format_hms(seconds: int) -> str:
@@ -99,9 +128,7 @@ def stop_timer():
         "amount": round(amount, 2),
     }
 
-    df = load_records()
-    df = pd.concat([df, pd.DataFrame([rec])], ignore_index=True, sort=False)
-    save_records(df)
+    append_record(rec)
     st.success("Recorded time entry.")
     # Reset input fields
     st.session_state.project = ""